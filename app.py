@@ -7,7 +7,7 @@ from stream_metadata.http_api import createApplication, serve_tcp_site
 from stream_metadata.listen_websocket import listen_websocket
 from stream_metadata.publish_stream_meta import publish_stream_meta
 from stream_metadata.publish_streamPrevious_meta import publish_streamPrevious_meta
-from stream_metadata.models import StreamMeta, Url
+from stream_metadata.models import FeedStats, StreamMeta, Url
 from track_metadata.publish_track_meta import publish_track_meta
 
 log = logging.getLogger(__name__)
@@ -19,13 +19,23 @@ async def main(options):
     logging.basicConfig(level=options['log_level'])
     queue_meta: asyncio.Queue[StreamMeta] = asyncio.Queue(maxsize=400)
     queue_timestamp: asyncio.Queue[StreamMeta] = asyncio.Queue(maxsize=1200)
+    feed_stats: dict[Url, FeedStats] = {}
+    catchup_ready: dict[str, asyncio.Event] = {
+        'streamPrevious': asyncio.Event(),
+        'track': asyncio.Event(),
+    }
     try:
         await asyncio.gather(
-            listen_websocket(queue_meta, queue_timestamp, options['websocket_url']),
+            listen_websocket(queue_meta, queue_timestamp, options['websocket_url'], feed_stats=feed_stats),
             publish_stream_meta(queue_meta, options['mqtt_host']),
-            publish_streamPrevious_meta(options['mqtt_host']),
-            serve_tcp_site(createApplication(queue_timestamp)),
-            publish_track_meta(options['mqtt_host']),
+            publish_streamPrevious_meta(options['mqtt_host'], ready=catchup_ready['streamPrevious']),
+            serve_tcp_site(createApplication(queue_timestamp, feed_stats, catchup_ready)),
+            publish_track_meta(
+                options['mqtt_host'],
+                ready=catchup_ready['track'],
+                schedule=options['track_schedule'],
+                schedule_offset_seconds=options['track_schedule_offset_seconds'],
+            ),
         )
     except asyncio.CancelledError:
         log.info('Keyboard Interrupt')
@@ -42,8 +52,10 @@ def get_args(argv=None) -> dict:
         prog=__name__,
         description=readme.read_text() if readme.exists() else '',
     )
-    parser.add_argument('--websocket_url', action='store', help='', type=Url, default=Url('ws://10.7.116.20/metadata/'))
+    parser.add_argument('--websocket_url', action='store', nargs='+', help='one or more redundant websocket feeds; consumed concurrently, first arrival wins', type=Url, default=[Url('ws://10.7.116.20/metadata/')])
     parser.add_argument('--mqtt_host', action='store', help='ues ENV MQTT_HOST', default=environ.get('MQTT_HOST', 'localhost'))  # TODO is this a Url?
+    parser.add_argument('--track_schedule', action='store_true', help='publish /track/ as a retained timeline; clients derive the active item locally')
+    parser.add_argument('--track_schedule_offset_seconds', action='store', type=int, help='seconds the listener is behind the playout `@` timestamps', default=20)
     parser.add_argument('--log_level', action='store', type=int, help='loglevel of output to stdout', default=logging.DEBUG)
     args = parser.parse_args(argv)
     return vars(args)
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterable, Awaitable, Callable, Iterable
+
+import aiomqtt
+
+log = logging.getLogger(__name__)
+
+
+class CatchupScheduler:
+    """
+    Process live MQTT messages ahead of retained backfill
+
+    On (re)connect the broker replays every retained message at once.
+    Live messages (`retain` flag unset) are handled by their own task, in order.
+    Retained backfill is handled by a separate background task, so a backfill
+    handler awaiting I/O (e.g. a lookup) does not hold up live messages.
+    Backfill is deferred while live messages are queued or being handled.
+    Otherwise the backfill task handles messages back-to-back for up to
+    `budget_seconds` (at least one message) before yielding to the event loop;
+    it cannot interrupt the work inside a single handler (e.g. one `merge_payloads`).
+    A live message waits for any in-flight backfill handler of a related topic.
+    `ready` is set once no retained message has arrived for `settle_seconds`
+    and all backfill has been processed (MQTT has no end-of-retained marker).
+
+    Only the latest retained message per topic is kept for backfill.
+    `supersedes(topic)`: topics whose pending backfill is dropped when a live message for `topic` arrives.
+    `depends_on(topic)`: topics whose pending backfill is handled before a live message for `topic`.
+
+    >>> from types import SimpleNamespace
+    >>> def message(topic, retain):
+    ...     return SimpleNamespace(topic=SimpleNamespace(value=topic), retain=retain)
+    >>> async def messages():
+    ...     yield message('/stream/a', retain=True)
+    ...     yield message('/stream/b', retain=True)
+    ...     yield message('/stream/c', retain=False)
+    ...     yield message('/stream/b', retain=False)
+    ...     await asyncio.Event().wait()
+    >>> async def demo(messages, **kwargs):
+    ...     handled = []
+    ...     async def handler(m):
+    ...         handled.append((m.topic.value, m.retain))
+    ...     scheduler = CatchupScheduler(handler, settle_seconds=0.01, **kwargs)
+    ...     task = asyncio.create_task(scheduler.run(messages))
+    ...     await scheduler.ready.wait()
+    ...     task.cancel()
+    ...     return handled
+    >>> asyncio.run(demo(messages(), supersedes=lambda topic: (topic,)))
+    [('/stream/c', False), ('/stream/b', False), ('/stream/a', True)]
+
+    A live `/stream/` must be merged on top of the retained `/streamPrevious/` history, never before it
+    >>> async def messages():
+    ...     yield message('/stream/a', retain=True)
+    ...     yield message('/streamPrevious/a', retain=True)
+    ...     yield message('/stream/a', retain=False)
+    ...     await asyncio.Event().wait()
+    >>> asyncio.run(demo(
+    ...     messages(),
+    ...     supersedes=lambda topic: (topic,),
+    ...     depends_on=lambda topic: ('/streamPrevious/' + topic.rsplit('/', 1)[-1],),
+    ... ))
+    [('/streamPrevious/a', True), ('/stream/a', False)]
+
+    A slow backfill handler (e.g. a lookup cache miss) is overtaken by live messages
+    >>> async def messages():
+    ...     yield message('/streamPrevious/a', retain=True)
+    ...     await asyncio.sleep(0.01)
+    ...     yield message('/streamPrevious/b', retain=False)
+    ...     await asyncio.Event().wait()
+    >>> async def slow_backfill_demo():
+    ...     handled = []
+    ...     async def handler(m):
+    ...         if m.retain:
+    ...             await asyncio.sleep(0.1)
+    ...         handled.append((m.topic.value, m.retain))
+    ...     scheduler = CatchupScheduler(handler, settle_seconds=0.01)
+    ...     task = asyncio.create_task(scheduler.run(messages()))
+    ...     await scheduler.ready.wait()
+    ...     task.cancel()
+    ...     return handled
+    >>> asyncio.run(slow_backfill_demo())
+    [('/streamPrevious/b', False), ('/streamPrevious/a', True)]
+
+    `budget_seconds` bounds how much backfill runs before a newly received live message is handled
+    >>> async def messages():
+    ...     yield message('/stream/a', retain=True)
+    ...     yield message('/stream/b', retain=True)
+    ...     yield message('/stream/c', retain=True)
+    ...     await asyncio.sleep(0)
+    ...     yield message('/stream/d', retain=False)
+    ...     await asyncio.Event().wait()
+    >>> asyncio.run(demo(messages(), budget_seconds=10))
+    [('/stream/a', True), ('/stream/b', True), ('/stream/c', True), ('/stream/d', False)]
+    >>> asyncio.run(demo(messages(), budget_seconds=0))
+    [('/stream/a', True), ('/stream/d', False), ('/stream/b', True), ('/stream/c', True)]
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[aiomqtt.Message], Awaitable[None]],
+        ready: asyncio.Event | None = None,
+        budget_seconds: float = 0.05,
+        settle_seconds: float = 2,
+        supersedes: Callable[[str], Iterable[str]] = lambda topic: (),
+        depends_on: Callable[[str], Iterable[str]] = lambda topic: (),
+    ):
+        self.handler = handler
+        self.ready = ready if ready is not None else asyncio.Event()
+        self.budget_seconds = budget_seconds
+        self.settle_seconds = settle_seconds
+        self.supersedes = supersedes
+        self.depends_on = depends_on
+        self._live: asyncio.Queue[aiomqtt.Message] = asyncio.Queue()
+        self._backfill: OrderedDict[str, aiomqtt.Message] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._live_idle = asyncio.Event()
+        self._live_idle.set()
+        self._wake = asyncio.Event()
+        self._last_backfill_received = time.monotonic()
+
+    def put(self, message: aiomqtt.Message) -> None:
+        topic = message.topic.value
+        if message.retain:
+            self._backfill.pop(topic, None)
+            self._backfill[topic] = message
+            self._last_backfill_received = time.monotonic()
+        else:
+            for superseded_topic in self.supersedes(topic):
+                self._backfill.pop(superseded_topic, None)
+            self._live.put_nowait(message)
+            self._live_idle.clear()
+            return
+        self._wake.set()
+
+    async def _read(self, messages: AsyncIterable[aiomqtt.Message]) -> None:
+        async for message in messages:
+            self.put(message)
+
+    async def _await_inflight(self, topics: Iterable[str]) -> None:
+        inflight = tuple(filter(None, map(self._inflight.get, topics)))
+        if inflight:
+            # Exceptions are raised by the backfill task that owns them
+            await asyncio.wait(inflight)
+
+    async def _process_live(self) -> None:
+        while True:
+            message = await self._live.get()
+            topic = message.topic.value
+            dependency_topics = tuple(self.depends_on(topic))
+            # Never let a backfill handler for this stream finish after (and overwrite) the live handler
+            await self._await_inflight((topic, *self.supersedes(topic), *dependency_topics))
+            for dependency_topic in dependency_topics:
+                if dependency_topic in self._backfill:
+                    await self.handler(self._backfill.pop(dependency_topic))
+            await self.handler(message)
+            if self._live.empty():
+                self._live_idle.set()
+
+    async def _process_backfill(self) -> None:
+        while True:
+            if self._backfill:
+                await self._live_idle.wait()
+                deadline = time.monotonic() + self.budget_seconds
+                while self._backfill and self._live_idle.is_set():
+                    topic, message = self._backfill.popitem(last=False)
+                    self._inflight[topic] = handled = asyncio.get_running_loop().create_future()
+                    try:
+                        await self.handler(message)
+                    finally:
+                        del self._inflight[topic]
+                        handled.set_result(None)
+                    if time.monotonic() >= deadline:
+                        break
+                await asyncio.sleep(0)  # yield to allow live messages to be received
+                continue
+            timeout = None
+            if not self.ready.is_set():
+                idle_seconds = time.monotonic() - self._last_backfill_received
+                if idle_seconds >= self.settle_seconds:
+                    self.ready.set()
+                    log.info("catchup complete")
+                    continue
+                timeout = self.settle_seconds - idle_seconds
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except TimeoutError:
+                pass
+
+    async def run(self, messages: AsyncIterable[aiomqtt.Message]) -> None:
+        self.ready.clear()
+        self._last_backfill_received = time.monotonic()
+        tasks = (
+            asyncio.create_task(self._read(messages)),
+            asyncio.create_task(self._process_live()),
+            asyncio.create_task(self._process_backfill()),
+        )
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+        for task in done:
+            task.result()  # re-raise exceptions (e.g. aiomqtt.MqttError) to the caller
@@ -6,7 +6,7 @@ from collections.abc import Mapping
 import aiohttp
 from aiohttp import web as aiohttp_web
 
-from .models import StreamMeta
+from .models import FeedStats, StreamMeta, Url
 
 README = pathlib.Path('README.md').read_text()
 
@@ -32,7 +32,29 @@ async def route_timestamps(request: aiohttp_web.Request) -> aiohttp_web.Response
     })
 
 
-def createApplication(queue_timestamp: asyncio.Queue[StreamMeta]) -> aiohttp_web.Application:
+async def route_feeds(request: aiohttp_web.Request) -> aiohttp_web.Response:
+    return aiohttp_web.json_response({
+        str(url): stats.json
+        for url, stats in request.app['feed_stats'].items()
+    })
+
+
+async def route_ready(request: aiohttp_web.Request) -> aiohttp_web.Response:
+    """
+    Readiness: 200 once every stage has caught up with the retained MQTT replay, else 503
+    """
+    ready = {
+        name: event.is_set()
+        for name, event in request.app['catchup_ready'].items()
+    }
+    return aiohttp_web.json_response(ready, status=200 if all(ready.values()) else 503)
+
+
+def createApplication(
+    queue_timestamp: asyncio.Queue[StreamMeta],
+    feed_stats: Mapping[Url, FeedStats] | None = None,
+    catchup_ready: Mapping[str, asyncio.Event] | None = None,
+) -> aiohttp_web.Application:
     app = aiohttp_web.Application()
     app.add_routes((aiohttp_web.get("/", route_readme),))
 
@@ -40,6 +62,13 @@ def createApplication(queue_timestamp: asyncio.Queue[StreamMeta]) -> aiohttp_web
     app['timestamps'] = timestamps_dict
     app['queue_timestamp'] = queue_timestamp
     app.add_routes((aiohttp_web.get("/timestamps", route_timestamps),))
+
+    app['feed_stats'] = feed_stats if feed_stats is not None else {}
+    app.add_routes((aiohttp_web.get("/feeds", route_feeds),))
+
+    app['catchup_ready'] = catchup_ready if catchup_ready is not None else {}
+    app.add_routes((aiohttp_web.get("/ready", route_ready),))
+
     # https://docs.aiohttp.org/en/stable/web_advanced.html#background-tasks
     async def background_tasks(app: aiohttp_web.Application):
         app[listen_to_queue_timestamps] = asyncio.create_task(listen_to_queue_timestamps(app))
@@ -1,12 +1,14 @@
 import asyncio
 import datetime
 import logging
-from collections.abc import Mapping
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Mapping, MutableMapping, Sequence
 
 import aiohttp
 import humanize
 
-from .models import StreamMeta, Url
+from .models import FeedStats, StreamMeta, Url
 
 log = logging.getLogger(__name__)
 
@@ -17,17 +19,137 @@ log = logging.getLogger(__name__)
 #    "origin": Url("http://10.7.116.20"),
 #}
 
+class FirstArrivalDedupe:
+    """
+    Merge playout payloads from redundant feeds by first arrival
+
+    The upstream re-sends the same payload on every frame, so repeats from the
+    same feed are ignored (as with a single feed).
+    Each published payload is an occurrence with its own sequence number per stream
+    (a stream can return to an earlier payload, e.g. `[]` -> `[H a]` -> `[]`).
+    Each feed tracks the last occurrence it has delivered:
+     * A payload matching the next occurrence the feed has not delivered yet is a
+       cross-feed duplicate; the lag behind the first delivery is recorded.
+     * Otherwise the payload is only new (published) when the feed is at the newest occurrence.
+       A feed behind the newest occurrence with an unknown payload is stale and dropped,
+       unless the newest occurrence is older than `resync_seconds` (the faster feeds have gone quiet).
+    `recent_payloads_per_stream` bounds how many occurrences per stream are remembered.
+
+    >>> stats = {'a': FeedStats(), 'b': FeedStats()}
+    >>> dedupe = FirstArrivalDedupe()
+    >>> def is_new(feed, payload, now):
+    ...     return dedupe.is_new(feed, 'stream', payload, stats[feed], now=now)
+
+    Feed `b` runs behind `a` and delivers the same payloads (including a return to `[]`)
+    >>> is_new('a', b'[]', 0), is_new('a', b'[]', 1), is_new('a', b'[H1]', 2), is_new('a', b'[]', 3)
+    (True, False, True, True)
+    >>> is_new('b', b'[]', 3), is_new('b', b'[]', 4), is_new('b', b'[H1]', 5), is_new('b', b'[]', 6)
+    (False, False, False, False)
+    >>> stats['a'].json['wins'], stats['a'].json['lag_max_seconds'], stats['b'].json['wins'], stats['b'].json['lag_mean_seconds']
+    (3, 0.0, 0, 3.0)
+
+    A -> B -> A on a lagging feed never republishes the older payload over a newer one
+    >>> is_new('a', b'[H2]', 10), is_new('a', b'[]', 11), is_new('a', b'[H3]', 12)
+    (True, True, True)
+    >>> is_new('b', b'[H2]', 13), is_new('b', b'[]', 14), is_new('b', b'[H3]', 15)
+    (False, False, False)
+
+    Once `b` has caught up it wins when it is fastest; a single feed returning to an earlier payload is published
+    >>> is_new('b', b'[H4]', 20), is_new('a', b'[H4]', 21), is_new('b', b'[H3]', 22), is_new('a', b'[H3]', 22.5)
+    (True, False, True, False)
+
+    A reconnected feed rejoins at its current payload without the outage counted as lag
+    >>> lag_max_seconds = stats['a'].json['lag_max_seconds']
+    >>> dedupe.reset_feed('a')
+    >>> is_new('a', b'[H3]', 100), is_new('a', b'[H5]', 101), stats['a'].json['lag_max_seconds'] == lag_max_seconds
+    (False, True, True)
+    """
+
+    def __init__(self, recent_payloads_per_stream: int = 8, resync_seconds: float = 10):
+        self.recent_payloads_per_stream = recent_payloads_per_stream
+        self.resync_seconds = resync_seconds
+        self.next_sequence = 0
+        # stream name -> sequence -> (payload, monotonic time of first arrival)
+        self.recent_stream_payloads: MutableMapping[str, OrderedDict[int, tuple[bytes, float]]] = {}
+        # (feed, stream name) -> previous payload from that feed
+        self.previous_feed_payload: MutableMapping[tuple[Hashable, str], bytes] = {}
+        # (feed, stream name) -> sequence of the last occurrence delivered by that feed
+        # (None: feed reconnected - rejoin at the newest matching occurrence)
+        self.feed_sequence: MutableMapping[tuple[Hashable, str], int | None] = {}
+
+    def reset_feed(self, feed: Hashable) -> None:
+        for key in tuple(self.feed_sequence):
+            if key[0] == feed:
+                self.feed_sequence[key] = None
+        for key in tuple(self.previous_feed_payload):
+            if key[0] == feed:
+                del self.previous_feed_payload[key]
+
+    def is_new(self, feed: Hashable, name: str, payload: bytes, stats: FeedStats, now: float | None = None) -> bool:
+        if self.previous_feed_payload.get((feed, name)) == payload:
+            return False
+        self.previous_feed_payload[(feed, name)] = payload
+        now = time.monotonic() if now is None else now
+        occurrences = self.recent_stream_payloads.setdefault(name, OrderedDict())
+        newest_sequence = next(reversed(occurrences), None)
+        feed_sequence = self.feed_sequence.get((feed, name), -1)
+
+        matching_sequences = [
+            sequence
+            for sequence, (occurrence_payload, _) in occurrences.items()
+            if occurrence_payload == payload and (feed_sequence is None or sequence > feed_sequence)
+        ]
+        if matching_sequences:
+            if feed_sequence is None:
+                self.feed_sequence[(feed, name)] = matching_sequences[-1]
+            else:
+                self.feed_sequence[(feed, name)] = matching_sequences[0]
+                stats.record_lag(now - occurrences[matching_sequences[0]][1])
+            return False
+
+        if (
+            feed_sequence is not None
+            and newest_sequence is not None
+            and feed_sequence != newest_sequence
+            and now - occurrences[newest_sequence][1] < self.resync_seconds
+        ):
+            return False  # behind the newest occurrence - stale
+
+        sequence = self.next_sequence
+        self.next_sequence += 1
+        occurrences[sequence] = (payload, now)
+        while len(occurrences) > self.recent_payloads_per_stream:
+            occurrences.popitem(last=False)
+        self.feed_sequence[(feed, name)] = sequence
+        stats.record_win()
+        return True
+
 
 async def listen_websocket(
     queue_meta: asyncio.Queue[StreamMeta],
     queue_timestamp: asyncio.Queue[StreamMeta],
-    websocket_url: Url,
-    reconnect_interval_seconds: int = 5
+    websocket_urls: Sequence[Url],
+    reconnect_interval_seconds: int = 5,
+    feed_stats: MutableMapping[Url, FeedStats] | None = None,
 ) -> None:
+    """
+    Hedged ingest from one or more redundant websocket feeds
+
+    Every feed is consumed concurrently. Frames are merged by first arrival:
+    the first feed to deliver a playout payload for a stream wins and is
+    published; the same payload arriving from any other feed is dropped and
+    recorded as lag for that feed. See `FirstArrivalDedupe`.
+    `/timestamps` reports the highest `UTC` seen per stream across all feeds.
+    """
     start_time = datetime.datetime.now()
     bytes_received = 0
     payloads_received = 0
-    previous_stream_meta_payload: Mapping[str, bytes] = dict()
+    dedupe = FirstArrivalDedupe()
+    latest_stream_meta_UTC: Mapping[str, datetime.datetime] = dict()
+    if feed_stats is None:
+        feed_stats = {}
+    for websocket_url in websocket_urls:
+        feed_stats.setdefault(websocket_url, FeedStats())
 
     def _parse_ws_message(msg: aiohttp.WSMessage) -> StreamMeta:
         nonlocal bytes_received, payloads_received
@@ -38,18 +160,17 @@ async def listen_websocket(
             data["s"], data["m"]
         )  # TODO: exception here is invisible? Why?
 
-    def _dedupe_meta(meta: StreamMeta) -> StreamMeta | None:
-        meta_playout_payload_msgpack_bytes = meta.playout_payload_msgpack_bytes
-        if meta_playout_payload_msgpack_bytes == previous_stream_meta_payload.get(meta.name):
-            return
-        previous_stream_meta_payload[meta.name] = meta_playout_payload_msgpack_bytes
-        return meta
-
+    def _is_latest_timestamp(meta: StreamMeta) -> bool:
+        if meta.name in latest_stream_meta_UTC and meta.UTC <= latest_stream_meta_UTC[meta.name]:
+            return False
+        latest_stream_meta_UTC[meta.name] = meta.UTC
+        return True
 
     WS_TIMEOUT = aiohttp.ClientWSTimeout(ws_receive=5, ws_close=5)
-    #await asyncio.sleep(3)  # wait to allow MQTT listeners to sync/catchup before fire-hosing more
-    while True:  # running?
-        try:
+
+    async def _listen_feed(websocket_url: Url) -> None:
+        stats = feed_stats[websocket_url]
+        while True:  # running?
             async with aiohttp.ClientSession() as session:
                 async with session.ws_connect(
                     timeout=WS_TIMEOUT,
@@ -57,14 +178,18 @@ async def listen_websocket(
                     origin=f'http://{websocket_url._parts.netloc}',  # TEMP Hack because current websocket needs the origin header to accept the connection?
                 ) as ws:
                     log.info(f"websocket connect {websocket_url=}")
+                    stats.connected = True
+                    dedupe.reset_feed(websocket_url)
                     try:
                         async for msg in ws:
                             if msg.type != aiohttp.WSMsgType.TEXT:
                                 # if msg.type == aiohttp.WSMsgType.ERROR:
                                 continue
                             meta = _parse_ws_message(msg)
-                            queue_timestamp.put_nowait(meta)
-                            if _dedupe_meta(meta):
+                            stats.frames += 1
+                            if _is_latest_timestamp(meta):
+                                queue_timestamp.put_nowait(meta)
+                            if dedupe.is_new(websocket_url, meta.name, meta.playout_payload_msgpack_bytes, stats):
                                 queue_meta.put_nowait(meta)
                     except asyncio.QueueShutDown:
                         await session.close()
@@ -77,14 +202,32 @@ async def listen_websocket(
                         log.exception(
                             "unknown exception in websocket message", exc_info=True
                         )
+                    finally:
+                        stats.connected = False
                 await session.close()
-        except asyncio.CancelledError:
-            seconds_elapsed = (datetime.datetime.now() - start_time).seconds
             log.warning(
-                f"QueueShutDown: received {payloads_received=} - Total {humanize.naturalsize(bytes_received)} - {humanize.naturalsize(bytes_received/seconds_elapsed)}/perSec"
+                f"Connection lost to {websocket_url=}; Reconnecting in {reconnect_interval_seconds=}"
             )
-            break
+            await asyncio.sleep(reconnect_interval_seconds)
+
+    async def _listen_feed_resilient(websocket_url: Url) -> None:
+        while True:
+            try:
+                return await _listen_feed(websocket_url)
+            except (aiohttp.ClientError, TimeoutError):
+                # Failure to connect - the other feeds continue to deliver
+                log.warning(
+                    f"Unable to connect to {websocket_url=}; Reconnecting in {reconnect_interval_seconds=}"
+                )
+                await asyncio.sleep(reconnect_interval_seconds)
+
+    #await asyncio.sleep(3)  # wait to allow MQTT listeners to sync/catchup before fire-hosing more
+    try:
+        await asyncio.gather(*map(_listen_feed_resilient, websocket_urls))
+    except asyncio.CancelledError:
+        seconds_elapsed = (datetime.datetime.now() - start_time).seconds or 1
         log.warning(
-            f"Connection lost to {websocket_url=}; Reconnecting in {reconnect_interval_seconds=}"
+            f"QueueShutDown: received {payloads_received=} - Total {humanize.naturalsize(bytes_received)} - {humanize.naturalsize(bytes_received/seconds_elapsed)}/perSec"
         )
-        await asyncio.sleep(reconnect_interval_seconds)
+        for websocket_url, stats in feed_stats.items():
+            log.warning(f"{websocket_url=} {stats.json}")
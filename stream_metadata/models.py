@@ -96,6 +96,20 @@ class PlayoutItem(NamedTuple):
             "@": int(self.at.timestamp()),
         }
 
+    @property
+    def schedule_json(self) -> JsonObject:
+        """
+        Status is omitted; clients derive the active item from `@` and their local clock
+
+        >>> PlayoutItem.from_json({"status": "H", "@": 1763735018, "type": "T", "id": "912067"}).schedule_json
+        {'id': '912067', 'type': 'T', '@': 1763735018}
+        """
+        return {
+            "id": self.id,
+            "type": str(self.type),
+            "@": int(self.at.timestamp()),
+        }
+
 
 class PlayoutPayload(NamedTuple):
     items: Sequence[PlayoutItem]
@@ -183,6 +197,57 @@ class StreamMeta(NamedTuple):
         return PlayoutPayload.from_json(self.playout_payload_json)
 
 
+class FeedStats:
+    """
+    Per upstream websocket feed statistics when hedging across redundant feeds
+
+    A `win` is a feed being first to deliver a new playout payload for a stream.
+    `lag` is how far behind the winning feed a duplicate payload arrived.
+
+    >>> stats = FeedStats()
+    >>> stats.record_win()
+    >>> stats.record_lag(0.5)
+    >>> stats.record_lag(1.5)
+    >>> stats.json
+    {'connected': False, 'frames': 0, 'wins': 1, 'win_rate': 0.333, 'lag_mean_seconds': 1.0, 'lag_max_seconds': 1.5}
+    """
+
+    def __init__(self):
+        self.connected = False
+        self.frames = 0
+        self.wins = 0
+        self.lags = 0
+        self.lag_total_seconds = 0.0
+        self.lag_max_seconds = 0.0
+
+    def record_win(self) -> None:
+        self.wins += 1
+
+    def record_lag(self, seconds: float) -> None:
+        self.lags += 1
+        self.lag_total_seconds += seconds
+        self.lag_max_seconds = max(self.lag_max_seconds, seconds)
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / (self.wins + self.lags) if self.wins + self.lags else 0
+
+    @property
+    def lag_mean_seconds(self) -> float:
+        return self.lag_total_seconds / self.lags if self.lags else 0
+
+    @property
+    def json(self) -> JsonObject:
+        return {
+            "connected": self.connected,
+            "frames": self.frames,
+            "wins": self.wins,
+            "win_rate": round(self.win_rate, 3),
+            "lag_mean_seconds": round(self.lag_mean_seconds, 3),
+            "lag_max_seconds": round(self.lag_max_seconds, 3),
+        }
+
+
 class StreamPlayoutPayloads:
     payloads: Sequence[PlayoutPayload]
 
@@ -228,6 +293,48 @@ class StreamPlayoutPayloads:
                     playout_items[playout_item.id_int] = playout_item
         return sorted(playout_items.values(), key=operator.attrgetter("at"))
 
+    @property
+    def schedule_key(self) -> Sequence[tuple[str, datetime.datetime]]:
+        """
+        The schedule changes only when an item is added/removed or its start time `@` moves
+
+        >>> h = {"status": "H", "@": 1763735018, "type": "T", "id": "1"}
+        >>> c = {"status": "C", "@": 1763735234, "type": "T", "id": "2"}
+        >>> schedule = StreamPlayoutPayloads.from_json([[h, c]]).schedule_key
+
+        A status flip with the same `@` is not a schedule change
+        >>> StreamPlayoutPayloads.from_json([[h | {"status": "C"}, c]]).schedule_key == schedule
+        True
+        >>> StreamPlayoutPayloads.from_json([[h, c | {"status": "H"}]]).schedule_key == schedule
+        True
+
+        A new or moved item is
+        >>> StreamPlayoutPayloads.from_json([[h, c, {"status": "C", "@": 1763735454, "type": "T", "id": "3"}]]).schedule_key == schedule
+        False
+        >>> StreamPlayoutPayloads.from_json([[h, c | {"@": 1763735300}]]).schedule_key == schedule
+        False
+        """
+        return tuple((playout_item.id, playout_item.at) for playout_item in self.items)
+
+    def schedule_json(self, offset_seconds: int, track_lookup: Mapping[int, JsonObject] = {}) -> JsonObject:
+        """
+        Retained timeline for clients to derive the active item from their local clock (stream time = now - `offset_seconds`)
+
+        >>> StreamPlayoutPayloads.from_json([[
+        ...     {"status": "H", "@": 1763735018, "type": "T", "id": "1"},
+        ...     {"status": "C", "@": 1763735234, "type": "T", "id": "2"},
+        ... ]]).schedule_json(20, {1: {"title": "One"}})
+        {'offset_seconds': 20, 'playout_items': ({'id': '1', 'type': 'T', '@': 1763735018, 'title': 'One'}, {'id': '2', 'type': 'T', '@': 1763735234})}
+        """
+        return {
+            "offset_seconds": offset_seconds,
+            # Merge playout_item.schedule_json with track images
+            "playout_items": tuple(
+                playout_item.schedule_json | track_lookup.get(playout_item.id_int, {})
+                for playout_item in self.items
+            ),
+        }
+
     def merge_payload(self, new_payload: PlayoutPayload) -> Self:
         """
         TODO: Really need to doctest this!!!
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import os
+import time
 from collections.abc import MutableMapping, Hashable
 from collections import defaultdict
 
@@ -8,6 +9,7 @@ import aiohttp
 import aiomqtt
 import msgpack
 
+from stream_metadata.catchup import CatchupScheduler
 from stream_metadata.models import StreamPlayoutPayloads
 
 log = logging.getLogger(__name__)
@@ -16,28 +18,62 @@ LOOKUP_ENDPOINT = os.environ.get("LOOKUP_ENDPOINT", "http://localhost:8002/looku
 
 LOOKUP_CACHE: MutableMapping[int, dict] = {}  # TODO: at some point this need to expire
 
+# Failed lookups are retried (schedule mode) with exponential backoff, a bounded number of times
+LOOKUP_RETRY_LIMIT = 5
+LOOKUP_RETRY_BACKOFF_SECONDS = 30
+LOOKUP_FAILURES: MutableMapping[int, tuple[int, float]] = {}  # playout_id -> (attempts, monotonic time of next retry)
+
 
 lookup_async_locks: defaultdict[Hashable, asyncio.Lock] = defaultdict(asyncio.Lock)
 async def _lookup_track(http: aiohttp.ClientSession, playout_id: int) -> dict:
     async with lookup_async_locks[playout_id]:
         if playout_id in LOOKUP_CACHE:
             return LOOKUP_CACHE.get(playout_id)
-        LOOKUP_CACHE[playout_id] = _ = await (
-            await http.get(LOOKUP_ENDPOINT + str(playout_id))
-        ).json()
+        try:
+            LOOKUP_CACHE[playout_id] = _ = await (
+                await http.get(LOOKUP_ENDPOINT + str(playout_id))
+            ).json()
+        except Exception:
+            attempts, _retry_at = LOOKUP_FAILURES.get(playout_id, (0, 0))
+            LOOKUP_FAILURES[playout_id] = (
+                attempts + 1,
+                time.monotonic() + LOOKUP_RETRY_BACKOFF_SECONDS * 2 ** attempts,
+            )
+            raise
+        LOOKUP_FAILURES.pop(playout_id, None)
         return _
 
 
+def _lookup_retry_due(playout_id: int) -> bool:
+    if playout_id not in LOOKUP_FAILURES:
+        return False
+    attempts, retry_at = LOOKUP_FAILURES[playout_id]
+    return attempts < LOOKUP_RETRY_LIMIT and time.monotonic() >= retry_at
+
+
 async def publish_track_meta(
     mqtt_host: str,  # Url?
     reconnect_interval_seconds: int = 5,
+    ready: asyncio.Event | None = None,
+    schedule: bool = False,
+    schedule_offset_seconds: int = 20,
 ) -> None:
+    """
+    `schedule` mode publishes a retained timeline of playout items with `@` start times
+    and a stream-time `offset_seconds` (events arrive ahead of the listener).
+    Clients derive the active item from their local clock, so `/track/` is only
+    republished when the schedule changes, not on every status flip.
+    Status and `isPlayingTrack` are omitted: schedule mode cannot tell when the
+    presenter is talking, the last started item is reported as active until the next starts.
+    """
     mqtt_client = aiomqtt.Client(mqtt_host)
+    last_schedule: MutableMapping[str, tuple] = {}
     while True:  # running?
         try:
             async with mqtt_client, aiohttp.ClientSession() as http:
                 await mqtt_client.subscribe("/streamPrevious/#")
-                async for message in mqtt_client.messages:
+
+                async def _handle_message(message: aiomqtt.Message) -> None:
                     # log.info(f"recv: {message.topic.value}")
                     meta_name = message.topic.value.removeprefix("/streamPrevious/")
                     incoming_streamPrevious_payloads = StreamPlayoutPayloads.from_json(
@@ -46,27 +82,52 @@ async def publish_track_meta(
 
                     playout_items = incoming_streamPrevious_payloads.items
 
+                    if schedule:
+                        schedule_key = incoming_streamPrevious_payloads.schedule_key
+                        if last_schedule.get(meta_name) == schedule_key:
+                            # Unchanged schedule: only republish if retrying a failed lookup returns new artwork
+                            retry_playout_ids = {
+                                playout_item.id_int
+                                for playout_item in playout_items
+                                if _lookup_retry_due(playout_item.id_int)
+                            }
+                            if not retry_playout_ids:
+                                return
+                            retried_tracks = await asyncio.gather(
+                                *(_lookup_track(http, playout_id) for playout_id in retry_playout_ids),
+                                return_exceptions=True,
+                            )
+                            if not any(track and not isinstance(track, Exception) for track in retried_tracks):
+                                return
+                        last_schedule[meta_name] = schedule_key
+
                     # Fetch track images from cached lookup - falling though to an athena call
+                    tracks = await asyncio.gather(
+                        *(
+                            _lookup_track(http, playout_item.id_int)
+                            for playout_item in playout_items
+                        ),
+                        return_exceptions=True,
+                    )
                     track_lookup: MutableMapping[int, dict] = {
                         int(track.get("playoutId", 0)): track  # type: ignore
-                        for track in await asyncio.gather(
-                            *(
-                                _lookup_track(http, playout_item.id_int)
-                                for playout_item in playout_items
-                            ),
-                            return_exceptions=True,
-                        )
+                        for track in tracks
                         if track and not isinstance(track, Exception)
                     }
 
-                    payload = {
-                        'isPlayingTrack': incoming_streamPrevious_payloads.latest.isPlayingTrack,
-                        # Merge playout_item.json with track images
-                        'playout_items': tuple(
-                            playout_item.json | track_lookup.get(playout_item.id_int, {})
-                            for playout_item in playout_items
+                    if schedule:
+                        payload = incoming_streamPrevious_payloads.schedule_json(
+                            schedule_offset_seconds, track_lookup
                         )
-                    }
+                    else:
+                        payload = {
+                            'isPlayingTrack': incoming_streamPrevious_payloads.latest.isPlayingTrack,
+                            # Merge playout_item.json with track images
+                            'playout_items': tuple(
+                                playout_item.json | track_lookup.get(playout_item.id_int, {})
+                                for playout_item in playout_items
+                            )
+                        }
 
                     # TODO: consider pure json output rather tha msgpack
                     # (currently msgpack for ease of MQTTx settings)
@@ -77,6 +138,12 @@ async def publish_track_meta(
                     )
                     log.info(f"publish: /track/{meta_name}")
 
+                # Live `/streamPrevious/` updates are handled ahead of the retained replay.
+                # `/streamPrevious/` is a full snapshot, so a live update supersedes pending backfill for that stream.
+                await CatchupScheduler(
+                    _handle_message, ready=ready, supersedes=lambda topic: (topic,)
+                ).run(mqtt_client.messages)
+
         except aiomqtt.MqttError:
             log.warning(
                 f"Connection lost to {mqtt_host=}; Reconnecting in {reconnect_interval_seconds=}"